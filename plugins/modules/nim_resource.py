@@ -32,15 +32,20 @@ options:
     description:
     - Specifies the action to be performed.
     - C(show) shows all NIM resource objects. Can be used with options I(name) or I(object_type) to filter objects.
-    - C(create) creates a NIM resource object. It requires options I(name), I(object_type) and I(attributes).
+    - C(create) creates a NIM resource object. It requires options I(name), I(object_type) and I(attributes),
+      or option I(resources) to create several objects at once.
     - C(delete) deletes a NIM resource object. It requires option I(name).
     type: str
     choices: [ show, create, delete ]
     required: true
   name:
     description:
-    - Specifies the NIM object name.
-    type: str
+    - Specifies the NIM object name(s).
+    - For I(action=show), a list of names can be given to display several
+      NIM resource objects with a single C(lsnim) call.
+    - For I(action=create) and I(action=delete), only one name is allowed.
+    type: list
+    elements: str
     required: false
   object_type:
     description:
@@ -58,6 +63,34 @@ options:
     - Specifies the attribute-value pairs required for I(action=create) or I(action=show)
     type: dict
     required: false
+  resources:
+    description:
+    - List of NIM resource objects to create with I(action=create).
+    - All the C(nim) define commands are run, one after the other, by a
+      single shell call.
+    - The batch stops at the first definition that fails, the following
+      objects are not defined. An object that already exists does not stop
+      the batch.
+    - Mutually exclusive with I(name), I(object_type) and I(attributes).
+    type: list
+    elements: dict
+    required: false
+    suboptions:
+      name:
+        description:
+        - Specifies the NIM object name.
+        type: str
+        required: true
+      object_type:
+        description:
+        - NIM resource object's type.
+        type: str
+        required: true
+      attributes:
+        description:
+        - Specifies the attribute-value pairs of the object.
+        type: dict
+        required: true
   showres:
     description:
     - show the contents of a resource.
@@ -80,7 +113,28 @@ options:
         - wait time in seconds in between retrying attempts to fetch the contents of a resorce.
         type: int
         default: 1
+  cache_ttl:
+    description:
+    - Number of seconds the output of C(lsnim -l -c resources) is kept in a
+      cache file and reused by I(action=show), instead of running C(lsnim)
+      for each call.
+    - The cache is invalidated when I(action=create) or I(action=delete)
+      changes a NIM resource object. A show that ran C(lsnim) before such a
+      change does not write its output to the cache.
+    - Changes made outside this module, for example by the C(nim) or
+      C(nim_suma) modules or by the nim command, do not invalidate the
+      cache. Objects removed that way can still be reported as found until
+      the cache expires.
+    - Objects or object types that are not in the cache, such as C(res_group)
+      or C(mac_group) objects, are still queried with C(lsnim).
+    - C(0) disables the cache.
+    type: int
+    default: 0
 notes:
+  - The cache used with I(cache_ttl) is stored in
+    C(/var/adm/ansible/nim_resource_cache.json). I(action=create) and
+    I(action=delete) write an invalidation marker to this file when they
+    change an object.
   - You can refer to the IBM documentation for additional information on the NIM concept and command
     at U(https://www.ibm.com/support/knowledgecenter/ssw_aix_73/install/nim_concepts.html),
     U(https://www.ibm.com/support/knowledgecenter/ssw_aix_73/n_commands/nim.html),
@@ -132,6 +186,21 @@ EXAMPLES = r'''
       bosinst_data: bosinst_data730
       comments: "730 Resources"
 
+- name: Define several NIM resource objects with a single call, the
+        spot is not defined if the lpp_source definition fails.
+  ibm.power_aix.nim_resource:
+    action: create
+    resources:
+    - name: lpp_730
+      object_type: lpp_source
+      attributes:
+        location: /nim1/copy_AIX7300_resource
+    - name: spot_730
+      object_type: spot
+      attributes:
+        source: lpp_730
+        location: /nim1/spot_730_resource
+
 - name: Show all the defined NIM resource objects.
   ibm.power_aix.nim_resource:
     action: show
@@ -146,6 +215,20 @@ EXAMPLES = r'''
     action: show
     name: lpp_730
 
+- name: Show several NIM resource objects at once.
+  ibm.power_aix.nim_resource:
+    action: show
+    name:
+    - lpp_730
+    - spot_730
+
+- name: Show a NIM resource object, reusing the output of a previous
+        lsnim call made in the last 5 minutes.
+  ibm.power_aix.nim_resource:
+    action: show
+    name: lpp_730
+    cache_ttl: 300
+
 - name: Delete a NIM resource object.
   ibm.power_aix.nim_resource:
     action: delete
@@ -171,9 +254,25 @@ stderr:
     returned: always
     type: str
 cmd:
-    description: Command executed.
+    description:
+    - Command executed.
+    - C(cache:<cache file>) when I(action=show) is answered from the cache
+      enabled by I(cache_ttl), without running any command.
     returned: always
     type: str
+resources_status:
+    description: Result of the definition of each NIM resource object.
+    returned: If I(action=create) with I(resources).
+    type: dict
+    sample:
+        "resources_status": {
+            "lpp_730": {
+                "msg": "Creation of resource lpp_730 was a success",
+                "rc": 0,
+                "stderr": "",
+                "stdout": ""
+            }
+        }
 nim_resource_found:
     description: Return if a queried object resource exist.
     returned: If I(action=show).
@@ -199,11 +298,60 @@ nim_resources:
 
 '''
 
+import fcntl
+import json
+import os
 import re
+import tempfile
 import time
 from ansible.module_utils.basic import AnsibleModule
-
-results = None
+from ansible.module_utils.six.moves import shlex_quote
+
+# Cache of the lsnim output used when cache_ttl is set
+NIM_RESOURCE_CACHE = '/var/adm/ansible/nim_resource_cache.json'
+# 'cmd' result when the objects are read from the cache, no command runs
+CACHE_CMD_MARKER = 'cache:{0}'
+
+# Marker echoed after each command of a batch, followed by the command
+# index and return code, to split the batch output per command.
+BATCH_SENTINEL = '__NIM_RESOURCE_RC__'
+
+# Valid characters for a NIM object name, names are checked against it
+# before being put on the command line. A name must not start with '-'
+# so it cannot be read as a command option.
+NIM_NAME_RE = re.compile(r'^[A-Za-z0-9_][A-Za-z0-9_.\-]*$')
+
+# lsnim -l output line, either an object name header 'name:' or one of
+# its 'attribute = value' lines. The value may itself contain '='.
+LSNIM_LINE_RE = re.compile(
+    r'^(?:(?P<header>[^\s=:]+):|[ \t]*(?P<key>[^=\n]+?)[ \t]*=[ \t]*(?P<value>.*?))[ \t\r]*$',
+    re.MULTILINE
+)
+
+# NIM error codes looked up in the command stderr
+# 0042-053 The NIM object is not there.
+ERR_NOT_FOUND = '0042-053'
+# 0042-081 The resource already exists on "master"
+ERR_EXISTS = '0042-081'
+# 0042-032 object name must be unique
+ERR_NOT_UNIQUE = '0042-032'
+# 0042-207 m_showres: Unable to allocate the resource to master.
+ERR_BUSY = '0042-207'
+
+# Known errors of each action, not reported as failures:
+# error code -> message
+ERR_TABLE = {
+    'show': {
+        ERR_NOT_FOUND: 'There is no NIM object resource named {name} ',
+    },
+    'create': {
+        ERR_EXISTS: 'Resource already exist',
+        ERR_NOT_UNIQUE: 'Resource already exist',
+    },
+    'delete': {
+        ERR_NOT_FOUND: 'There is no NIM object resource named {name} ',
+    },
+}
 
 NIM_SHOWRES = [
     'spot',
@@ -232,6 +380,223 @@ NIM_SHOWRES_FILESET_HEADERS = [
 ]
 
 
+def format_cmd(cmd):
+    """
+    Build a printable command line from an argument list
+
+    arguments:
+        cmd     (list): command arguments
+    returns:
+        the command line with shell quoting where needed (str)
+    """
+    return ' '.join(shlex_quote(arg) for arg in cmd)
+
+
+def find_nim_error(action, stderr):
+    """
+    Look for a known error of the action in the command stderr
+
+    arguments:
+        action  (str): action performed, key of ERR_TABLE
+        stderr  (str): stderr of the command
+    returns:
+        message of the error found (str), None otherwise
+    """
+    for code, message in ERR_TABLE[action].items():
+        if code in stderr:
+            return message
+    return None
+
+
+def run_nim_cmd(module, cmd, action, name, fail_msg):
+    """
+    Run a nim or lsnim command and check its errors against ERR_TABLE
+
+    arguments:
+        module    (dict): The Ansible module
+        cmd       (list): command arguments
+        action     (str): action performed, key of ERR_TABLE
+        name       (str): NIM object name used in the messages
+        fail_msg   (str): message of an unknown error
+    note:
+        Exits with fail_json in case of unknown error
+    returns:
+        (return_code, results): the command return code and the results
+                                dictionary with its cmd, stdout and stderr
+    """
+    return_code, stdout, stderr = module.run_command(cmd)
+
+    results = dict(cmd=format_cmd(cmd), stdout=stdout, stderr=stderr)
+
+    if return_code != 0:
+        message = find_nim_error(action, stderr)
+        if message is None:
+            results['msg'] = fail_msg
+            results['rc'] = return_code
+            module.fail_json(**results)
+        results['msg'] = message.format(name=name)
+
+    return return_code, results
+
+
+def cache_lock():
+    """
+    Take an exclusive lock serializing the cache file writers
+
+    returns:
+        the open lock file, closing it releases the lock
+    """
+    cache_dir = os.path.dirname(NIM_RESOURCE_CACHE)
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    lock_file = open(NIM_RESOURCE_CACHE + '.lock', 'w')
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    return lock_file
+
+
+def cache_read(cache_ttl):
+    """
+    Read the NIM resources from the cache file if it is fresh enough
+
+    arguments:
+        cache_ttl (int): maximum age of the cache in seconds
+    returns:
+        NIM object dictionary (dict) or None if there is no valid cache
+    """
+    try:
+        with open(NIM_RESOURCE_CACHE, 'r') as cache_file:
+            cache = json.load(cache_file)
+        if time.time() - cache['timestamp'] < cache_ttl:
+            return cache['nim_resources']
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def cache_replace(content):
+    """
+    Atomically replace the cache file content, the caller holds the lock
+
+    arguments:
+        content  (dict): data to write as JSON
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(NIM_RESOURCE_CACHE))
+    with os.fdopen(fd, 'w') as tmp_file:
+        json.dump(content, tmp_file)
+    os.rename(tmp_path, NIM_RESOURCE_CACHE)
+
+
+def cache_write(module, nim_resources, started):
+    """
+    Atomically replace the cache file with the given NIM resources
+
+    arguments:
+        module         (dict): The Ansible module
+        nim_resources  (dict): NIM object dictionary
+        started       (float): time the lsnim command was started
+    note:
+        The write is skipped if the cache was invalidated after the lsnim
+        command started, the NIM resources may then be outdated.
+        A failure to write the cache is only reported as a warning.
+    """
+    try:
+        lock_file = cache_lock()
+        try:
+            try:
+                with open(NIM_RESOURCE_CACHE, 'r') as cache_file:
+                    invalidated = json.load(cache_file).get('invalidated', 0)
+            except (IOError, OSError, ValueError, AttributeError):
+                invalidated = 0
+            if invalidated >= started:
+                return
+            cache_replace({'timestamp': started, 'nim_resources': nim_resources})
+        finally:
+            lock_file.close()
+    except (IOError, OSError) as err:
+        module.warn('Unable to write the NIM resource cache {0}: {1}'.format(NIM_RESOURCE_CACHE, err))
+
+
+def cache_invalidate(module):
+    """
+    Invalidate the cache file after a NIM resource object changed
+
+    The cache is replaced by an invalidation marker holding the current
+    time rather than removed, so that a show running lsnim concurrently
+    does not write its outdated output back afterwards.
+
+    arguments:
+        module  (dict): The Ansible module
+    """
+    try:
+        lock_file = cache_lock()
+        try:
+            cache_replace({'invalidated': time.time()})
+        finally:
+            lock_file.close()
+    except (IOError, OSError) as err:
+        module.warn('Unable to invalidate the NIM resource cache {0}: {1}'.format(NIM_RESOURCE_CACHE, err))
+
+
+def res_show_cached(module):
+    """
+    Show nim resources from the cache, refreshing it if needed.
+
+    arguments:
+        module  (dict): The Ansible module
+    note:
+        Exits with fail_json in case of error
+    return:
+        results dictionary (dict), or None if some requested objects or
+        the requested object type are not in the cache and lsnim must be
+        called.
+    """
+    names = module.params['name']
+    object_type = module.params['object_type']
+
+    nim_resources = cache_read(module.params['cache_ttl'])
+
+    if nim_resources is None:
+        cmd = ['/usr/sbin/lsnim', '-l', '-c', 'resources']
+        started = time.time()
+        return_code, results = run_nim_cmd(
+            module, cmd, 'show', 'resources', 'Error trying to display NIM resource objects'
+        )
+
+        nim_resources = build_dic(results['stdout'])
+        cache_write(module, nim_resources, started)
+
+        # the full dump of the resources class is not what was asked for,
+        # the requested objects are returned in nim_resources.
+        results['stdout'] = ''
+        results['msg'] = 'NIM resource objects read with lsnim, cache {0} refreshed'.format(NIM_RESOURCE_CACHE)
+    else:
+        results = dict(
+            cmd=CACHE_CMD_MARKER.format(NIM_RESOURCE_CACHE),
+            stdout='',
+            stderr='',
+            msg='NIM resource objects read from {0}'.format(NIM_RESOURCE_CACHE),
+        )
+
+    if names:
+        if any(name not in nim_resources for name in names):
+            return None
+        nim_resources = dict((name, nim_resources[name]) for name in names)
+
+    if object_type:
+        nim_resources = dict(
+            (name, info) for name, info in nim_resources.items()
+            if info.get('type') == object_type
+        )
+        # objects of other classes, such as res_group, are not in the cache
+        if not nim_resources:
+            return None
+
+    results['nim_resources'] = nim_resources
+    results['nim_resource_found'] = bool(nim_resources)
+
+    return results
+
+
 def res_show(module):
     '''
     Show nim resources.
@@ -241,59 +606,211 @@ def res_show(module):
     note:
         Exits with fail_json in case of error
     return:
-        updated results dictionary.
+        results dictionary (dict)
     '''
 
-    cmd = '/usr/sbin/lsnim -l'
-    name = module.params['name']
+    results = {}
+
+    cmd = ['/usr/sbin/lsnim', '-l']
+    names = module.params['name']
     object_type = module.params['object_type']
 
     # This module will only show general information about the resource
     # object class.
-    if not object_type and not name:
-        cmd += ' -c resources'
+    if not object_type and not names:
+        cmd += ['-c', 'resources']
 
     if object_type:
-        cmd += ' -t {0}'.format(object_type)
+        cmd += ['-t', object_type]
 
-    if name:
-        cmd += ' ' + name
+    if names:
+        cmd += names
 
     if module.check_mode:
-        results['msg'] = 'Command \'{0}\' preview mode, execution skipped.'.format(cmd)
-        return
+        results['msg'] = 'Command \'{0}\' preview mode, execution skipped.'.format(format_cmd(cmd))
+        return results
+
+    if module.params['cache_ttl'] > 0:
+        results = res_show_cached(module) or results
+
+    if 'nim_resources' not in results:
+        return_code, results = run_nim_cmd(
+            module, cmd, 'show', ', '.join(names or []),
+            'Error trying to display object {0}'.format(' '.join(names or []))
+        )
+
+        # lsnim still lists the objects it found when some of the queried
+        # names do not exist.
+        results['nim_resources'] = build_dic(results['stdout'])
+        results['nim_resource_found'] = bool(results['nim_resources'])
+
+        if return_code != 0:
+            # only report the missing names
+            missing = [name for name in names or [] if name not in results['nim_resources']]
+            if missing:
+                results['msg'] = ERR_TABLE['show'][ERR_NOT_FOUND].format(name=', '.join(missing))
+            elif object_type:
+                results['msg'] = 'There is no NIM object resource of type {0} '.format(object_type)
 
-    return_code, stdout, stderr = module.run_command(cmd)
+    if module.params['showres']:
+        # check if we need to fetch the filesets installed in a lpp_source or
+        # spot NIM object.
+        for resource, info in results['nim_resources'].items():
+            results['nim_resources'][resource]['contents'] = res_showres(module, resource, info)
 
-    results['stderr'] = stderr
-    results['stdout'] = stdout
-    results['cmd'] = cmd
-    results['nim_resources'] = {}
-    results['nim_resource_found'] = False
+    return results
 
-    if return_code != 0:
 
-        # 0042-053 The NIM objefct is not there.
-        pattern = r"0042-053"
-        found = re.search(pattern, stderr)
+def define_cmd(nim_cmd, name, object_type, attributes):
+    """
+    Build the nim command defining a NIM resource object
+
+    arguments:
+        nim_cmd      (str): path of the nim command
+        name         (str): NIM object name
+        object_type  (str): NIM resource object's type
+        attributes  (dict): attribute-value pairs of the object
+    returns:
+        the command arguments (list)
+    """
+    if object_type == "res_group":
+        cmd = [nim_cmd, '-o', 'define']
+    else:
+        cmd = [nim_cmd, '-a', 'server=master', '-o', 'define']
+    cmd += ['-t', object_type]
+
+    if attributes is not None:
+        for attr, val in attributes.items():
+            cmd += ['-a', '{0}={1}'.format(attr, val)]
+
+    cmd.append(name)
+
+    return cmd
+
+
+def split_batch_output(output, count):
+    """
+    Split the output of a batch on the sentinel lines
+
+    arguments:
+        output   (str): stdout or stderr of the batch
+        count    (int): number of commands in the batch
+    returns:
+        (outputs, rcs, clean): the output of each command (list of str),
+                               their return codes (list of int, None if
+                               not run) and the whole output without the
+                               sentinel lines (str)
+    """
+    outputs = [''] * count
+    rcs = [None] * count
+    clean = []
+    lines = []
+
+    for line in output.splitlines(True):
+        # the command output may not end with a new line
+        pos = line.find(BATCH_SENTINEL)
+        if pos >= 0:
+            lines.append(line[:pos])
+            fields = line[pos:].split()
+            index = int(fields[1])
+            outputs[index] = ''.join(lines)
+            if len(fields) > 2:
+                rcs[index] = int(fields[2])
+            lines = []
+        else:
+            lines.append(line)
+        clean.append(line[:pos] if pos >= 0 else line)
+
+    return outputs, rcs, ''.join(clean)
+
+
+def res_create_batch(nim_cmd, module):
+    '''
+    Define several NIM resource objects with a single shell call.
+
+    arguments:
+        module  (dict): The Ansible module
+    note:
+        Exits with fail_json in case of error
+    return:
+        results dictionary (dict)
+    '''
+
+    results = {}
+
+    resources = module.params['resources']
+
+    # errors that do not stop the batch, the object already exists
+    known_errors = '|'.join('*{0}*'.format(code) for code in ERR_TABLE['create'])
 
-        if found:
-            results['msg'] = 'There is no NIM object resource named {0} '.format(name)
+    # stderr of each command is captured to look for known errors, its
+    # stdout goes to the batch stdout through file descriptor 3.
+    script = ['exec 3>&1']
+    for index, resource in enumerate(resources):
+        cmd = define_cmd(nim_cmd, resource['name'], resource['object_type'], resource['attributes'])
+        script.append('err=$({0} 2>&1 1>&3); rc=$?'.format(format_cmd(cmd)))
+        script.append('[ -n "$err" ] && printf \'%s\\n\' "$err" >&2')
+        script.append('echo {0} {1} $rc'.format(BATCH_SENTINEL, index))
+        script.append('echo {0} {1} >&2'.format(BATCH_SENTINEL, index))
+        script.append('if [ $rc -ne 0 ]; then case "$err" in {0}) ;; *) exit $rc ;; esac; fi'.format(known_errors))
+    script = '\n'.join(script)
+
+    if module.check_mode:
+        results['cmd'] = script
+        results['msg'] = 'Command \'{0}\' preview mode, execution skipped.'.format(script)
+        return results
+
+    return_code, stdout, stderr = module.run_command(['/bin/sh', '-c', script])
+
+    stdouts, rcs, results['stdout'] = split_batch_output(stdout, len(resources))
+    stderrs, dummy, results['stderr'] = split_batch_output(stderr, len(resources))
+
+    results['cmd'] = script
+    results['resources_status'] = {}
+    results['changed'] = False
+
+    failed = []
+    not_run = []
+    for index, resource in enumerate(resources):
+        name = resource['name']
+        status = dict(rc=rcs[index], stdout=stdouts[index], stderr=stderrs[index])
+
+        if rcs[index] is None:
+            status['msg'] = 'Definition of resource {0} was not run'.format(name)
+            not_run.append(name)
+        elif rcs[index] != 0:
+            message = find_nim_error('create', stderrs[index])
+            if message is None:
+                status['msg'] = 'Error trying to define resource {0} '.format(name)
+                failed.append(name)
+            else:
+                status['msg'] = message.format(name=name)
+        else:
+            status['msg'] = 'Creation of resource {0} was a success'.format(name)
+            results['changed'] = True
+
+        results['resources_status'][name] = status
+
+    if results['changed']:
+        cache_invalidate(module)
+
+    if failed or not_run:
+        if failed:
+            # the batch stopped with the return code of the failed definition
+            results['rc'] = results['resources_status'][failed[0]]['rc']
+            results['msg'] = 'Error trying to define resource(s) {0}'.format(', '.join(failed))
         else:
-            results['msg'] = 'Error trying to display object {0}'.format(name)
             results['rc'] = return_code
-            module.fail_json(**results)
-    else:
-        results['nim_resources'] = build_dic(stdout)
-        results['nim_resource_found'] = True
+            results['msg'] = 'Error trying to run the definition of resources'
+        if not_run:
+            results['msg'] += ', not run: {0}'.format(', '.join(not_run))
+        module.fail_json(**results)
 
-    if module.params['showres']:
-        # check if we need to fetch the filesets installed in a lpp_source or
-        # spot NIM object.
-        for resource, info in results['nim_resources'].items():
-            results['nim_resources'][resource]['contents'] = res_showres(module, resource, info)
+    results['msg'] = 'Definition of resources {0} done'.format(
+        ', '.join(resource['name'] for resource in resources)
+    )
 
-    return
+    return results
 
 
 def res_create(nim_cmd, module):
@@ -305,57 +822,35 @@ def res_create(nim_cmd, module):
     note:
         Exits with fail_json in case of error
     return:
-        updated results dictionary.
+        results dictionary (dict)
     '''
 
-    opts = ""
-    name = module.params['name']
+    results = {}
+
+    name = module.params['name'][0]
     object_type = module.params['object_type']
     attributes = module.params['attributes']
 
-    if object_type:
-        if object_type == "res_group":
-            cmd = nim_cmd + ' -o define '
-        else:
-            cmd = nim_cmd + ' -a server=master -o define '
-        cmd += ' -t ' + object_type
-
-    if attributes is not None:
-        for attr, val in attributes.items():
-            opts += " -a {0}=\"{1}\" ".format(attr, val)
-        cmd += opts
+    if not object_type or not attributes:
+        results['msg'] = 'Options object_type and attributes are required to create resource {0}'.format(name)
+        module.fail_json(**results)
 
-    if name:
-        cmd += ' ' + name
+    cmd = define_cmd(nim_cmd, name, object_type, attributes)
 
     if module.check_mode:
-        results['msg'] = 'Command \'{0}\' preview mode, execution skipped.'.format(cmd)
-        return
-
-    return_code, stdout, stderr = module.run_command(cmd)
-
-    results['stderr'] = stderr
-    results['stdout'] = stdout
-    results['cmd'] = cmd
+        results['msg'] = 'Command \'{0}\' preview mode, execution skipped.'.format(format_cmd(cmd))
+        return results
 
-    if return_code != 0:
-
-        # 0042-081 The resource already exists on "master"
-        # 0042-032 object name must be unique
-        pattern = r"0042-081|0042-032"
-        found = re.search(pattern, stderr)
-        if not found:
-            results['rc'] = return_code
-            results['msg'] = 'Error trying to define resource {0} '.format(name)
-            module.fail_json(**results)
-        else:
-            results['msg'] = 'Resource already exist'
+    return_code, results = run_nim_cmd(
+        module, cmd, 'create', name, 'Error trying to define resource {0} '.format(name)
+    )
 
-    else:
+    if return_code == 0:
         results['msg'] = 'Creation of resource {0} was a success'.format(name)
         results['changed'] = True
+        cache_invalidate(module)
 
-    return
+    return results
 
 
 def res_delete(nim_cmd, module):
@@ -367,68 +862,52 @@ def res_delete(nim_cmd, module):
     note:
         Exits with fail_json in case of error
     return:
-        updated results dictionary.
+        results dictionary (dict)
     '''
 
-    name = module.params['name']
-    cmd = nim_cmd + ' -o remove {0}'.format(name)
+    results = {}
 
-    if module.check_mode:
-        results['msg'] = 'Command \'{0}\' in preview mode, execution skipped.'.format(cmd)
-        return
+    name = module.params['name'][0]
+    cmd = [nim_cmd, '-o', 'remove', name]
 
-    return_code, stdout, stderr = module.run_command(cmd)
-
-    results['stderr'] = stderr
-    results['stdout'] = stdout
-    results['cmd'] = cmd
-
-    if return_code != 0:
-
-        # 0042-053 The NIM objefct is not there.
-        pattern = r"0042-053"
-        found = re.search(pattern, stderr)
+    if module.check_mode:
+        results['msg'] = 'Command \'{0}\' preview mode, execution skipped.'.format(format_cmd(cmd))
+        return results
 
-        if found:
-            results['msg'] = 'There is no NIM object resource named {0} '.format(name)
-        else:
-            results['msg'] = 'Error trying to remove NIM object {0}'.format(name)
-            results['rc'] = return_code
-            module.fail_json(**results)
+    return_code, results = run_nim_cmd(
+        module, cmd, 'delete', name, 'Error trying to remove NIM object {0}'.format(name)
+    )
 
-    else:
+    if return_code == 0:
         results['msg'] = 'Resource {0} was removed.'.format(name)
         results['changed'] = True
+        cache_invalidate(module)
 
-    return
+    return results
 
 
 def build_dic(stdout):
     """
-    Build dictionary with the stdout info
+    Build dictionary with the lsnim output
 
     arguments:
-        stdout   (str): stdout of the command to parse
+        stdout   (str): stdout of the lsnim -l command to parse
     returns:
         info    (dict): NIM object dictionary
     """
 
-    info1 = {}
     info = {}
-
-    lines = stdout.splitlines()
-
-    for line in lines:
-
-        key = (line.split('=')[0]).strip()
-        size = len(line.split('='))
-
-        if size > 1:
-            value = (line.split('=')[1]).strip()
-            info1[key] = value
-        else:
-            info[key[:-1]] = info1
-            info1.clear()
+    info1 = None
+
+    # a single scan of the output, no list of lines is built
+    for match in LSNIM_LINE_RE.finditer(stdout):
+        if match.group('header') is not None:
+            # the object name header comes before its attributes,
+            # start a new dictionary for them.
+            info1 = {}
+            info[match.group('header')] = info1
+        elif info1 is not None:
+            info1[match.group('key')] = match.group('value')
 
     return info
 
@@ -446,41 +925,40 @@ def res_showres(module, resource, info):
     """
     fail_msg = 'Unable to fetch contents of {0}.'.format(resource)
     max_retries = module.params['showres']['max_retries']
-    retry_wait_time = module.params['showres']['max_retries']
+    retry_wait_time = module.params['showres']['retry_wait_time']
     contents = {}
-    results['testing'] = ""
-    # 0042-001 nim: processing error encountered on "master":,
-    #     0042-207 m_showres: Unable to allocate the spot_72V_2114 resource to master.
-    pattern = r"0042-207"
 
     if info['type'] in NIM_SHOWRES:
-        cmd = 'nim -o showres '
+        cmd = ['nim', '-o', 'showres']
         if info['type'] == 'spot':
-            cmd += '-a lslpp_flags=Lc '
+            cmd += ['-a', 'lslpp_flags=Lc']
         elif info['type'] == 'lpp_source':
-            cmd += '-a installp_flags=L '
-        cmd += resource
+            cmd += ['-a', 'installp_flags=L']
+        # the object name is always the last argument
+        cmd.append(resource)
 
         while True:
             return_code, stdout, stderr = module.run_command(cmd)
-            results['testing'] += "max_retries: {0}, rc: {1}".format(max_retries, return_code)
 
             if return_code != 0:
                 max_retries -= 1
-                results['cmd'] = cmd
-                results['stderr'] = stderr
-                results['stdout'] = stdout
-                results['rc'] = return_code
+                results = dict(
+                    changed=False,
+                    msg=fail_msg,
+                    cmd=format_cmd(cmd),
+                    stderr=stderr,
+                    stdout=stdout,
+                    rc=return_code,
+                )
 
                 if max_retries == 0:
-                    results['msg'] += fail_msg
-                    results['msg'] += "Number of attempts to fetch contents of "
-                    results['msg'] += "{0} has been reached.".format(resource)
+                    results['msg'] = '{0} Number of attempts to fetch contents of {1} has been reached.'.format(
+                        fail_msg, resource
+                    )
                     module.fail_json(**results)
                     break
 
-                found = re.search(pattern, stderr)
-                if found:
+                if ERR_BUSY in stderr:
                     # error code 0042-207 means that the resource is
                     # currently being used by another showres command
                     # wait and retry
@@ -488,7 +966,6 @@ def res_showres(module, resource, info):
                     continue
                 else:
                     # for any other error proceed to the next resource
-                    results['msg'] += fail_msg
                     module.fail_json(**results)
                     break
             else:
@@ -523,27 +1000,38 @@ def res_showres(module, resource, info):
 
 
 def main():
-    global results
-
     showres_spec = dict(
         fetch_contents=dict(type='bool', default=False),
         max_retries=dict(type='int', default=10),
         retry_wait_time=dict(type='int', default=1)
     )
 
+    resources_spec = dict(
+        name=dict(type='str', required=True),
+        object_type=dict(type='str', required=True),
+        attributes=dict(type='dict', required=True),
+    )
+
     module = AnsibleModule(
 
         argument_spec=dict(
             action=dict(type='str', required=True, choices=['show', 'create', 'delete']),
-            name=dict(type='str'),
+            name=dict(type='list', elements='str'),
             object_type=dict(type='str'),
             attributes=dict(type='dict'),
+            resources=dict(type='list', elements='dict', options=resources_spec),
             showres=dict(type='dict', options=showres_spec),
+            cache_ttl=dict(type='int', default=0),
         ),
         required_if=[
-            ('action', 'create', ('name', 'object_type', 'attributes')),
+            ('action', 'create', ('name', 'resources'), True),
             ('action', 'delete', ('name',), True),
         ],
+        mutually_exclusive=[
+            ('name', 'resources'),
+            ('object_type', 'resources'),
+            ('attributes', 'resources'),
+        ],
         supports_check_mode=True
     )
 
@@ -563,12 +1051,30 @@ def main():
 
     action = module.params['action']
 
+    if module.params['resources'] and action != 'create':
+        results['msg'] = 'Option resources is only supported with action create.'
+        module.fail_json(**results)
+
+    names = module.params['name']
+    if module.params['resources']:
+        names = [resource['name'] for resource in module.params['resources']]
+    if names:
+        invalid = [name for name in names if not NIM_NAME_RE.match(name)]
+        if invalid:
+            results['msg'] = 'Invalid NIM object name(s): {0}'.format(', '.join(invalid))
+            module.fail_json(**results)
+        if action in ['create', 'delete'] and len(names) > 1 and not module.params['resources']:
+            results['msg'] = 'Only one NIM object name is allowed with action {0}.'.format(action)
+            module.fail_json(**results)
+
     if action == 'show':
-        res_show(module)
+        results.update(res_show(module))
+    elif action == 'create' and module.params['resources']:
+        results.update(res_create_batch(nim_cmd, module))
     elif action == 'create':
-        res_create(nim_cmd, module)
+        results.update(res_create(nim_cmd, module))
     elif action == 'delete':
-        res_delete(nim_cmd, module)
+        results.update(res_delete(nim_cmd, module))
     else:
         results['msg'] = 'The action selected is NOT recognized. Please check again.'
         module.fail_json(**results)
@@ -0,0 +1,424 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import unittest
+from unittest import mock
+import copy
+import os
+import shutil
+import tempfile
+import time
+
+from ansible_collections.ibm.power_aix.plugins.modules import nim_resource
+
+from .common.utils import (
+    AnsibleFailJson, fail_json, rootdir, lsnim_output_path1
+)
+
+params = {
+    "action": "show",
+    "name": None,
+    "object_type": None,
+    "attributes": None,
+    "resources": None,
+    "showres": None,
+    "cache_ttl": 0,
+}
+
+
+class TestBuildDic(unittest.TestCase):
+    def setUp(self):
+        with open(lsnim_output_path1, "r") as f:
+            self.lsnim_output1 = f.read()
+
+    def test_one_entry_per_object(self):
+        info = nim_resource.build_dic(self.lsnim_output1)
+        self.assertEqual(sorted(info.keys()), ['ResGrp730', 'lpp_730', 'spot_730'])
+
+    def test_attributes_belong_to_their_object(self):
+        info = nim_resource.build_dic(self.lsnim_output1)
+        self.assertEqual(info['lpp_730']['type'], 'lpp_source')
+        self.assertEqual(info['lpp_730']['location'], '/nim1/copy_AIX7300_resource')
+        self.assertEqual(info['spot_730']['type'], 'spot')
+        self.assertEqual(info['spot_730']['oslevel_r'], '7300-00')
+        self.assertNotIn('oslevel_r', info['lpp_730'])
+        self.assertEqual(len(info['ResGrp730']), 5)
+
+    def test_value_containing_equal_sign(self):
+        info = nim_resource.build_dic(self.lsnim_output1)
+        self.assertEqual(info['ResGrp730']['comments'], '730 Resources, see key=value')
+
+    def test_empty_output(self):
+        self.assertEqual(nim_resource.build_dic(''), {})
+
+
+class TestResShow(unittest.TestCase):
+    def setUp(self):
+        global params
+        self.module = mock.Mock()
+        self.module.params = copy.deepcopy(params)
+        self.module.check_mode = False
+        self.module.fail_json = fail_json
+        with open(lsnim_output_path1, "r") as f:
+            self.lsnim_output1 = f.read()
+
+    def test_several_names_single_command(self):
+        self.module.params['name'] = ['lpp_730', 'spot_730', 'ResGrp730']
+        self.module.run_command.return_value = (0, self.lsnim_output1, '')
+        results = nim_resource.res_show(self.module)
+        self.assertEqual(self.module.run_command.call_count, 1)
+        cmd = self.module.run_command.call_args[0][0]
+        self.assertEqual(cmd[-3:], ['lpp_730', 'spot_730', 'ResGrp730'])
+        self.assertTrue(results['nim_resource_found'])
+        self.assertEqual(len(results['nim_resources']), 3)
+
+    def test_some_names_not_found(self):
+        self.module.params['name'] = ['lpp_730', 'spot_730', 'ResGrp730', 'missing']
+        stderr = '0042-053 lsnim: there is no NIM object named "missing"'
+        self.module.run_command.return_value = (1, self.lsnim_output1, stderr)
+        results = nim_resource.res_show(self.module)
+        self.assertTrue(results['nim_resource_found'])
+        self.assertIn('missing', results['msg'])
+        self.assertNotIn('lpp_730', results['msg'])
+
+    def test_object_type_not_found(self):
+        self.module.params['object_type'] = 'spot'
+        stderr = '0042-053 lsnim: there is no NIM object of type "spot"'
+        self.module.run_command.return_value = (1, '', stderr)
+        results = nim_resource.res_show(self.module)
+        cmd = self.module.run_command.call_args[0][0]
+        self.assertEqual(cmd, ['/usr/sbin/lsnim', '-l', '-t', 'spot'])
+        self.assertFalse(results['nim_resource_found'])
+        self.assertEqual(results['nim_resources'], {})
+        self.assertIn('of type spot', results['msg'])
+
+    def test_check_mode_skips_lsnim(self):
+        self.module.params['name'] = ['lpp_730']
+        self.module.check_mode = True
+        results = nim_resource.res_show(self.module)
+        self.module.run_command.assert_not_called()
+        self.assertIn('preview mode', results['msg'])
+        self.assertNotIn('nim_resources', results)
+
+    def test_fail_show(self):
+        self.module.params['name'] = ['lpp_730']
+        self.module.run_command.return_value = (1, '', 'sample stderr')
+        with self.assertRaises(AnsibleFailJson) as result:
+            nim_resource.res_show(self.module)
+        result = result.exception.args[0]
+        self.assertTrue(result['failed'])
+        self.assertEqual(result['rc'], 1)
+
+
+class TestResShowCache(unittest.TestCase):
+    def setUp(self):
+        global params
+        self.module = mock.Mock()
+        self.module.params = copy.deepcopy(params)
+        self.module.params['cache_ttl'] = 300
+        self.module.check_mode = False
+        self.module.fail_json = fail_json
+        with open(lsnim_output_path1, "r") as f:
+            self.lsnim_output1 = f.read()
+        self.module.run_command.return_value = (0, self.lsnim_output1, '')
+        self.cache_dir = tempfile.mkdtemp()
+        patcher = mock.patch.object(
+            nim_resource, 'NIM_RESOURCE_CACHE',
+            os.path.join(self.cache_dir, 'nim_resource_cache.json')
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def test_cache_reused(self):
+        self.module.params['name'] = ['lpp_730']
+        nim_resource.res_show(self.module)
+        self.assertTrue(os.path.exists(nim_resource.NIM_RESOURCE_CACHE))
+        cmd = self.module.run_command.call_args[0][0]
+        self.assertEqual(cmd, ['/usr/sbin/lsnim', '-l', '-c', 'resources'])
+
+        self.module.params['name'] = ['spot_730']
+        results = nim_resource.res_show(self.module)
+        self.assertEqual(self.module.run_command.call_count, 1)
+        self.assertEqual(list(results['nim_resources'].keys()), ['spot_730'])
+        self.assertTrue(results['nim_resource_found'])
+        self.assertEqual(results['cmd'], 'cache:' + nim_resource.NIM_RESOURCE_CACHE)
+        self.assertEqual(results['stdout'], '')
+        self.assertIn('read from', results['msg'])
+
+    def test_cache_refresh_results(self):
+        self.module.params['name'] = ['lpp_730']
+        results = nim_resource.res_show(self.module)
+        self.assertEqual(results['cmd'], '/usr/sbin/lsnim -l -c resources')
+        self.assertEqual(results['stdout'], '')
+        self.assertIn('refreshed', results['msg'])
+        self.assertEqual(list(results['nim_resources'].keys()), ['lpp_730'])
+
+    def test_cache_filter_object_type(self):
+        self.module.params['object_type'] = 'spot'
+        results = nim_resource.res_show(self.module)
+        self.assertEqual(list(results['nim_resources'].keys()), ['spot_730'])
+
+    def test_object_type_not_in_cache(self):
+        self.module.params['object_type'] = 'mac_group'
+        nim_resource.res_show(self.module)
+        self.assertEqual(self.module.run_command.call_count, 2)
+        cmd = self.module.run_command.call_args[0][0]
+        self.assertEqual(cmd, ['/usr/sbin/lsnim', '-l', '-t', 'mac_group'])
+
+    def test_res_group_queried_with_lsnim(self):
+        # res_group objects are in the groups class, not in lsnim -c resources
+        resources_output = self.lsnim_output1[:self.lsnim_output1.index('ResGrp730:')]
+        self.module.run_command.side_effect = [
+            (0, resources_output, ''),
+            (0, self.lsnim_output1, ''),
+        ]
+        self.module.params['object_type'] = 'res_group'
+        results = nim_resource.res_show(self.module)
+        self.assertEqual(self.module.run_command.call_count, 2)
+        cmd = self.module.run_command.call_args[0][0]
+        self.assertEqual(cmd, ['/usr/sbin/lsnim', '-l', '-t', 'res_group'])
+        self.assertTrue(results['nim_resource_found'])
+
+    def test_name_not_in_cache(self):
+        self.module.params['name'] = ['missing']
+        nim_resource.res_show(self.module)
+        self.assertEqual(self.module.run_command.call_count, 2)
+        cmd = self.module.run_command.call_args[0][0]
+        self.assertEqual(cmd, ['/usr/sbin/lsnim', '-l', 'missing'])
+
+    def test_cache_invalidated(self):
+        nim_resource.res_show(self.module)
+        self.assertTrue(os.path.exists(nim_resource.NIM_RESOURCE_CACHE))
+        self.module.params['action'] = 'delete'
+        self.module.params['name'] = ['spot_730']
+        self.module.run_command.return_value = (0, '', '')
+        nim_resource.res_delete('/usr/sbin/nim', self.module)
+        self.assertIsNone(nim_resource.cache_read(300))
+
+    def test_outdated_write_skipped(self):
+        # a show starts lsnim, then a delete invalidates the cache
+        started = time.time()
+        nim_resource.cache_invalidate(self.module)
+        nim_resource.cache_write(self.module, {'spot_730': {'type': 'spot'}}, started)
+        self.assertIsNone(nim_resource.cache_read(300))
+
+        nim_resource.cache_write(self.module, {'spot_730': {'type': 'spot'}}, time.time() + 1)
+        self.assertEqual(nim_resource.cache_read(300), {'spot_730': {'type': 'spot'}})
+
+
+class TestResCreate(unittest.TestCase):
+    def setUp(self):
+        global params
+        self.module = mock.Mock()
+        self.module.params = copy.deepcopy(params)
+        self.module.params['action'] = 'create'
+        self.module.params['name'] = ['ResGrp730']
+        self.module.params['object_type'] = 'res_group'
+        self.module.params['attributes'] = {'spot': 'spot_730', 'comments': '730 Resources'}
+        self.module.check_mode = False
+        self.module.fail_json = fail_json
+
+    def test_create_argument_list(self):
+        self.module.run_command.return_value = (0, '', '')
+        results = nim_resource.res_create('/usr/sbin/nim', self.module)
+        cmd = self.module.run_command.call_args[0][0]
+        self.assertEqual(cmd, [
+            '/usr/sbin/nim', '-o', 'define', '-t', 'res_group',
+            '-a', 'spot=spot_730', '-a', 'comments=730 Resources', 'ResGrp730'
+        ])
+        self.assertTrue(results['changed'])
+
+    def test_create_already_exists(self):
+        stderr = '0042-081 nim: the resource already exists on "master"'
+        self.module.run_command.return_value = (1, '', stderr)
+        results = nim_resource.res_create('/usr/sbin/nim', self.module)
+        self.assertFalse(results.get('changed'))
+        self.assertEqual(results['msg'], 'Resource already exist')
+
+
+class TestResDelete(unittest.TestCase):
+    def setUp(self):
+        global params
+        self.module = mock.Mock()
+        self.module.params = copy.deepcopy(params)
+        self.module.params['action'] = 'delete'
+        self.module.params['name'] = ['spot_730']
+        self.module.check_mode = True
+        self.module.fail_json = fail_json
+
+    def test_check_mode_skips_nim(self):
+        results = nim_resource.res_delete('/usr/sbin/nim', self.module)
+        self.module.run_command.assert_not_called()
+        self.assertFalse(results.get('changed'))
+        self.assertIn('preview mode', results['msg'])
+
+    def test_delete_not_found(self):
+        self.module.check_mode = False
+        stderr = '0042-053 nim: there is no NIM object named "spot_730"'
+        self.module.run_command.return_value = (1, '', stderr)
+        results = nim_resource.res_delete('/usr/sbin/nim', self.module)
+        self.assertFalse(results.get('changed'))
+        self.assertIn('There is no NIM object resource named spot_730', results['msg'])
+
+    def test_fail_delete(self):
+        self.module.check_mode = False
+        self.module.run_command.return_value = (1, '', 'sample stderr')
+        with self.assertRaises(AnsibleFailJson) as result:
+            nim_resource.res_delete('/usr/sbin/nim', self.module)
+        result = result.exception.args[0]
+        self.assertEqual(result['rc'], 1)
+        self.assertEqual(result['msg'], 'Error trying to remove NIM object spot_730')
+
+
+class TestResShowres(unittest.TestCase):
+    def setUp(self):
+        global params
+        self.module = mock.Mock()
+        self.module.params = copy.deepcopy(params)
+        self.module.params['showres'] = {
+            'fetch_contents': True, 'max_retries': 3, 'retry_wait_time': 7
+        }
+        self.module.fail_json = fail_json
+        self.stdout = "#Package Name:Fileset Name:Level\n" \
+            "bos:bos.rte:7.3.0.0\n" \
+            "bos:bos.rte:7.3.0.1\n"
+
+    def test_spot_contents(self):
+        self.module.run_command.return_value = (0, self.stdout, '')
+        contents = nim_resource.res_showres(self.module, 'spot_730', {'type': 'spot'})
+        cmd = self.module.run_command.call_args[0][0]
+        self.assertEqual(cmd, ['nim', '-o', 'showres', '-a', 'lslpp_flags=Lc', 'spot_730'])
+        self.assertEqual(contents['bos.rte']['level'], ['7.3.0.0', '7.3.0.1'])
+
+    @mock.patch('time.sleep')
+    def test_busy_retry_wait_time(self, mock_sleep):
+        self.module.run_command.side_effect = [
+            (1, '', '0042-207 m_showres: Unable to allocate the spot_730 resource'),
+            (0, self.stdout, ''),
+        ]
+        nim_resource.res_showres(self.module, 'spot_730', {'type': 'spot'})
+        mock_sleep.assert_called_once_with(7)
+
+
+class TestResCreateBatch(unittest.TestCase):
+    def setUp(self):
+        global params
+        self.module = mock.Mock()
+        self.module.params = copy.deepcopy(params)
+        self.module.params['action'] = 'create'
+        self.module.params['resources'] = [
+            {'name': 'lpp_730', 'object_type': 'lpp_source',
+             'attributes': {'location': '/nim1/copy_AIX7300_resource'}},
+            {'name': 'spot_730', 'object_type': 'spot',
+             'attributes': {'source': 'lpp_730', 'location': '/nim1/spot_730_resource'}},
+        ]
+        self.module.check_mode = False
+        self.module.fail_json = fail_json
+        patcher = mock.patch.object(nim_resource, 'cache_invalidate')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_single_shell_call(self):
+        stdout = "__NIM_RESOURCE_RC__ 0 0\n__NIM_RESOURCE_RC__ 1 0\n"
+        stderr = "__NIM_RESOURCE_RC__ 0\n__NIM_RESOURCE_RC__ 1\n"
+        self.module.run_command.return_value = (0, stdout, stderr)
+        results = nim_resource.res_create_batch('/usr/sbin/nim', self.module)
+        self.assertEqual(self.module.run_command.call_count, 1)
+        cmd = self.module.run_command.call_args[0][0]
+        self.assertEqual(cmd[:2], ['/bin/sh', '-c'])
+        self.assertIn('-t spot -a source=lpp_730', cmd[2])
+        self.assertTrue(results['changed'])
+        status = results['resources_status']
+        self.assertEqual(status['lpp_730']['rc'], 0)
+        self.assertEqual(status['spot_730']['rc'], 0)
+
+    def test_one_definition_failed(self):
+        stdout = "__NIM_RESOURCE_RC__ 0 1\n__NIM_RESOURCE_RC__ 1 0\n"
+        stderr = "0042-081 nim: the resource already exists on \"master\"\n" \
+            "__NIM_RESOURCE_RC__ 0\n" \
+            "__NIM_RESOURCE_RC__ 1\n"
+        self.module.run_command.return_value = (0, stdout, stderr)
+        results = nim_resource.res_create_batch('/usr/sbin/nim', self.module)
+        status = results['resources_status']
+        self.assertEqual(status['lpp_730']['msg'], 'Resource already exist')
+        self.assertTrue(results['changed'])
+
+    def test_batch_stops_at_failure(self):
+        # the batch exits after the failed lpp_source definition
+        stdout = "__NIM_RESOURCE_RC__ 0 1\n"
+        stderr = "0042-001 nim: processing error\n" \
+            "__NIM_RESOURCE_RC__ 0\n"
+        self.module.run_command.return_value = (1, stdout, stderr)
+        with self.assertRaises(AnsibleFailJson) as result:
+            nim_resource.res_create_batch('/usr/sbin/nim', self.module)
+        result = result.exception.args[0]
+        self.assertEqual(result['rc'], 1)
+        self.assertEqual(result['msg'], 'Error trying to define resource(s) lpp_730, not run: spot_730')
+        self.assertIsNone(result['resources_status']['spot_730']['rc'])
+        self.assertFalse(result['changed'])
+        script = self.module.run_command.call_args[0][0][2]
+        self.assertIn('*0042-081*|*0042-032*) ;; *) exit $rc', script)
+
+    def test_sentinels_stripped(self):
+        stdout = "lpp_730 defined\n__NIM_RESOURCE_RC__ 0 0\n__NIM_RESOURCE_RC__ 1 0\n"
+        stderr = "warning\n__NIM_RESOURCE_RC__ 0\n__NIM_RESOURCE_RC__ 1\n"
+        self.module.run_command.return_value = (0, stdout, stderr)
+        results = nim_resource.res_create_batch('/usr/sbin/nim', self.module)
+        self.assertEqual(results['stdout'], 'lpp_730 defined\n')
+        self.assertEqual(results['stderr'], 'warning\n')
+        self.assertEqual(results['resources_status']['lpp_730']['stdout'], 'lpp_730 defined\n')
+
+    def test_check_mode(self):
+        self.module.check_mode = True
+        results = nim_resource.res_create_batch('/usr/sbin/nim', self.module)
+        self.module.run_command.assert_not_called()
+        self.assertIn('spot_730', results['msg'])
+        self.assertIn('spot_730', results['cmd'])
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        global params
+        self.ansible_module_path = rootdir + "nim_resource.AnsibleModule"
+        self.module = mock.Mock()
+        self.module.params = copy.deepcopy(params)
+        self.module.check_mode = False
+        self.module.fail_json = fail_json
+        self.module.get_bin_path.return_value = '/usr/sbin/nim'
+
+    def test_fail_name_starting_with_dash(self):
+        self.module.params['action'] = 'delete'
+        self.module.params['name'] = ['-F']
+        with mock.patch(self.ansible_module_path) as mocked_ansible_module:
+            mocked_ansible_module.return_value = self.module
+            with self.assertRaises(AnsibleFailJson) as result:
+                nim_resource.main()
+        result = result.exception.args[0]
+        self.assertIn('Invalid NIM object name(s): -F', result['msg'])
+        self.module.run_command.assert_not_called()
+
+    def test_fail_name_option_injection(self):
+        self.module.params['name'] = ['-c', 'resources']
+        with mock.patch(self.ansible_module_path) as mocked_ansible_module:
+            mocked_ansible_module.return_value = self.module
+            with self.assertRaises(AnsibleFailJson) as result:
+                nim_resource.main()
+        result = result.exception.args[0]
+        self.assertIn('-c', result['msg'])
+        self.module.run_command.assert_not_called()
+
+    def test_fail_resources_with_show(self):
+        self.module.params['resources'] = [
+            {'name': 'spot_730', 'object_type': 'spot', 'attributes': {'source': 'lpp_730'}}
+        ]
+        with mock.patch(self.ansible_module_path) as mocked_ansible_module:
+            mocked_ansible_module.return_value = self.module
+            with self.assertRaises(AnsibleFailJson) as result:
+                nim_resource.main()
+        result = result.exception.args[0]
+        self.assertIn('only supported with action create', result['msg'])
+        self.module.run_command.assert_not_called()